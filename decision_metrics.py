@@ -0,0 +1,112 @@
+# decision_metrics.py
+
+import json
+import time
+
+# ---------- LATENCY HISTOGRAM -------------------------------------------------
+# Log-linear buckets (8 per power of two, <7% relative error), so recording is a
+# couple of integer ops and histograms from different processes can be summed.
+SUB_BUCKETS = 8
+N_BUCKETS = 16 + 60 * SUB_BUCKETS
+
+def _bucket_index(ns: int) -> int:
+    if ns < 16:
+        return max(ns, 0)
+    e = ns.bit_length()
+    return 16 + (e - 5) * SUB_BUCKETS + ((ns >> (e - 4)) - 8)
+
+def _bucket_value(idx: int) -> float:
+    """Midpoint of a bucket in nanoseconds."""
+    if idx < 16:
+        return float(idx)
+    e = (idx - 16) // SUB_BUCKETS + 5
+    m = (idx - 16) % SUB_BUCKETS + 8
+    return ((m << (e - 4)) + ((m + 1) << (e - 4))) / 2
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        self.counts[_bucket_index(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns: self.max_ns = ns
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                return min(_bucket_value(idx), self.max_ns)
+        return float(self.max_ns)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def summary(self) -> dict[str, float]:
+        us = 1e-3
+        return {
+            "count": self.count,
+            "mean_us": self.total_ns / self.count * us if self.count else 0.0,
+            "p50_us": self.percentile(0.50) * us,
+            "p95_us": self.percentile(0.95) * us,
+            "p99_us": self.percentile(0.99) * us,
+            "max_us": self.max_ns * us,
+        }
+
+# ---------- DECISION PROFILER -------------------------------------------------
+class DecisionProfiler:
+    """
+    Per-stage latency histograms and event counters for the decision path.
+    Callers take `now()` timestamps around each stage and hand the deltas to
+    `record`; with `enabled = False` both become no-ops apart from the call.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.counters: dict[str, int] = {}
+
+    now = staticmethod(time.perf_counter_ns)
+
+    def record(self, stage: str, ns: int):
+        if not self.enabled: return
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = LatencyHistogram()
+        hist.record(ns)
+
+    def incr(self, counter: str, n: int = 1):
+        if not self.enabled: return
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def merge(self, other: "DecisionProfiler"):
+        for stage, hist in other.stages.items():
+            self.stages.setdefault(stage, LatencyHistogram()).merge(hist)
+        for counter, n in other.counters.items():
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def reset(self):
+        self.stages.clear()
+        self.counters.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "stages": {stage: hist.summary() for stage, hist in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def export_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
@@ -2,6 +2,46 @@ import eval7
 
 import eval7
 import random
+from itertools import combinations
+import numpy as np
+
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+# Card index = rank * 4 + suit, so combos and dead-card masks can live in NumPy arrays
+CARD_STRS = [r + s for r in RANKS for s in SUITS]
+CARD_INDEX = {c: i for i, c in enumerate(CARD_STRS)}
+COMBOS = np.array(list(combinations(range(52), 2)), dtype=np.int64)  # (1326, 2)
+COMBO_INDEX = {(int(a), int(b)): i for i, (a, b) in enumerate(COMBOS)}
+COMBO_MASK = (np.uint64(1) << COMBOS[:, 0].astype(np.uint64)) | (np.uint64(1) << COMBOS[:, 1].astype(np.uint64))
+TARGET_SE = 0.005     # range_equity samples until its standard error drops below this
+SAMPLE_BATCH = 4096
+MAX_SAMPLES = 65_536  # caps the per-decision cost when the target isn't reached
+
+# --- Vectorized 7-card evaluator ---
+# Lookup tables over 13-bit rank masks; scores are category * 13**5 + kickers in base 13,
+# so a higher score is a better hand (same order as eval7).
+RANK_BITS = 1 << np.arange(13)
+POPCOUNT = np.array([bin(m).count("1") for m in range(1 << 13)])
+HIGH_RANK = np.array([m.bit_length() - 1 for m in range(1 << 13)])
+
+def _top_n_table(n):
+    table = np.zeros(1 << 13, dtype=np.int64)
+    for m in range(1 << 13):
+        ranks = [r for r in range(12, -1, -1) if m >> r & 1][:n]
+        table[m] = sum(r * 13 ** (n - 1 - k) for k, r in enumerate(ranks))
+    return table
+
+TOP2, TOP3, TOP5 = _top_n_table(2), _top_n_table(3), _top_n_table(5)
+
+def _straight_high(m):
+    for top in range(12, 3, -1):
+        run = 0b11111 << (top - 4)
+        if (m & run) == run:
+            return top
+    wheel = (1 << 12) | 0b1111  # A-2-3-4-5
+    return 3 if (m & wheel) == wheel else -1
+
+STRAIGHT_HIGH = np.array([_straight_high(m) for m in range(1 << 13)])
 
 def estimate_equity(hero_hand, board, num_opponents, num_samples=1000):
     # hero_hand: ['Ah', 'Kd']
@@ -27,8 +67,178 @@ def estimate_equity(hero_hand, board, num_opponents, num_samples=1000):
             wins += 0.5  # Split pot
     return wins / num_samples
 
-def bot_best_move(hero_hand, board, pot, to_call, stack, num_opponents=1):
-    equity = estimate_equity(hero_hand, board, num_opponents)
+def card_mask(cards):
+    mask = np.uint64(0)
+    for c in cards:
+        mask |= np.uint64(1) << np.uint64(CARD_INDEX[c])
+    return mask
+
+def _class_combos(label):
+    # 'AKs' / 'AKo' / 'AK' / 'QQ' -> list of combo indices
+    r1, r2 = label[0].upper(), label[1].upper()
+    kind = label[2].lower() if len(label) > 2 else ""
+    combos = []
+    for s1 in SUITS:
+        for s2 in SUITS:
+            if r1 == r2 and s1 >= s2:
+                continue
+            if kind == "s" and s1 != s2:
+                continue
+            if kind == "o" and s1 == s2:
+                continue
+            a, b = sorted((CARD_INDEX[r1 + s1], CARD_INDEX[r2 + s2]))
+            combos.append(COMBO_INDEX[(a, b)])
+    return combos
+
+def combo_weights(hand_range):
+    """
+    Converts a range into a (1326,) weight vector over COMBOS.
+    Accepts a (1326,) array, a 13x13 chart (row/col 0 = Ace, suited above the
+    diagonal, offsuit below) or a dict like {'AKs': 1.0, 'QQ': 0.5, 'AhKd': 1.0}.
+    """
+    if isinstance(hand_range, dict):
+        weights = np.zeros(len(COMBOS))
+        for label, w in hand_range.items():
+            if len(label) == 4:
+                a, b = sorted((CARD_INDEX[label[:2]], CARD_INDEX[label[2:]]))
+                weights[COMBO_INDEX[(a, b)]] = w
+            else:
+                weights[_class_combos(label)] = w
+        return weights
+
+    arr = np.asarray(hand_range, dtype=float)
+    if arr.shape == (len(COMBOS),):
+        return arr.copy()
+    if arr.shape == (13, 13):
+        weights = np.zeros(len(COMBOS))
+        chart_ranks = RANKS[::-1]
+        for i in range(13):
+            for j in range(13):
+                if arr[i, j] == 0:
+                    continue
+                hi, lo = chart_ranks[min(i, j)], chart_ranks[max(i, j)]
+                kind = "" if i == j else ("s" if i < j else "o")
+                weights[_class_combos(hi + lo + kind)] = arr[i, j]
+        return weights
+    raise ValueError(f"Unsupported range shape: {arr.shape}")
+
+def _bit(rank):
+    return np.where(rank >= 0, 1 << np.maximum(rank, 0), 0)
+
+def evaluate7(cards):
+    """Scores an (N, 7) array of card indices in one pass; higher is better."""
+    n = len(cards)
+    rows = np.arange(n)
+    ranks, suits = cards // 4, cards % 4
+    counts = np.zeros((n, 13), dtype=np.int64)
+    suit_masks = np.zeros((n, 4), dtype=np.int64)
+    for j in range(cards.shape[1]):
+        counts[rows, ranks[:, j]] += 1
+        suit_masks[rows, suits[:, j]] |= 1 << ranks[:, j]
+
+    m1 = (counts >= 1) @ RANK_BITS
+    m2 = (counts == 2) @ RANK_BITS
+    m3 = (counts == 3) @ RANK_BITS
+    m4 = (counts == 4) @ RANK_BITS
+    flush = np.where(POPCOUNT[suit_masks] >= 5, suit_masks, 0).max(axis=1)
+
+    straight_flush = STRAIGHT_HIGH[flush]
+    straight = STRAIGHT_HIGH[m1]
+    quad = HIGH_RANK[m4]
+    trip = HIGH_RANK[m3]
+    fh_pair = HIGH_RANK[(m3 & ~_bit(trip)) | m2]
+    pair1 = HIGH_RANK[m2]
+    pair2 = HIGH_RANK[m2 & ~_bit(pair1)]
+
+    category = np.select(
+        [straight_flush >= 0, quad >= 0, (trip >= 0) & (fh_pair >= 0), flush > 0,
+         straight >= 0, trip >= 0, pair2 >= 0, pair1 >= 0],
+        [8, 7, 6, 5, 4, 3, 2, 1], default=0)
+    kickers = np.select(
+        [category == 8, category == 7, category == 6, category == 5, category == 4,
+         category == 3, category == 2, category == 1],
+        [straight_flush,
+         quad * 13 + HIGH_RANK[m1 & ~_bit(quad)],
+         trip * 13 + fh_pair,
+         TOP5[flush],
+         straight,
+         trip * 169 + TOP2[m1 & ~_bit(trip)],
+         pair1 * 169 + pair2 * 13 + HIGH_RANK[m1 & ~(_bit(pair1) | _bit(pair2))],
+         pair1 * 2197 + TOP3[m1 & ~_bit(pair1)]],
+        default=TOP5[m1])
+    return category * 13 ** 5 + kickers
+
+def range_equity(hero_hand, board, opp_ranges, target_se=TARGET_SE, max_samples=MAX_SAMPLES, rng=None):
+    """
+    Hero equity against one weighted range per opponent.
+    Opponent combos and runouts are sampled jointly in vectorized batches: combos are drawn
+    from each range with dead cards removed, draws where opponents collide are rejected, and
+    the runout comes from the cards left. Batches continue until the standard error reaches
+    `target_se`. Heads-up on the river the answer is exact over the whole range.
+    """
+    rng = rng or np.random.default_rng()
+    hero = np.array([CARD_INDEX[c] for c in hero_hand])
+    board_idx = np.array([CARD_INDEX[c] for c in board], dtype=np.int64)
+    dead = card_mask(hero_hand + board)
+
+    weights = np.array([combo_weights(r) for r in opp_ranges])  # (n_opp, 1326)
+    weights[:, (COMBO_MASK & dead) != 0] = 0
+    mass = weights.sum(axis=1)
+    if (mass <= 0).any():
+        raise ValueError("An opponent range has no combos left after card removal.")
+    probs = weights / mass[:, None]
+    to_come = 5 - len(board)
+
+    if to_come == 0 and len(opp_ranges) == 1:
+        support = np.flatnonzero(weights[0])
+        hands = np.concatenate([np.vstack([hero, COMBOS[support]]),
+                                np.broadcast_to(board_idx, (len(support) + 1, 5))], axis=1)
+        scores = evaluate7(hands)
+        share = (scores[0] > scores[1:]) + 0.5 * (scores[0] == scores[1:])
+        return float(probs[0, support] @ share)
+
+    deck_bits = np.uint64(1) << np.arange(52, dtype=np.uint64)
+    total, total_sq, n, drawn = 0.0, 0.0, 0, 0
+    while drawn < max_samples * 4 and n < max_samples:
+        picks = np.array([rng.choice(len(COMBOS), size=SAMPLE_BATCH, p=p) for p in probs])
+        drawn += SAMPLE_BATCH
+        masks = COMBO_MASK[picks]  # (n_opp, batch)
+        valid = np.ones(SAMPLE_BATCH, dtype=bool)
+        for i, j in combinations(range(len(opp_ranges)), 2):
+            valid &= (masks[i] & masks[j]) == 0
+        if not valid.any():
+            continue
+        picks, masks = picks[:, valid], masks[:, valid]
+        m = picks.shape[1]
+
+        # Runouts: the `to_come` lowest random keys among cards nobody holds
+        used = np.bitwise_or.reduce(masks, axis=0) | dead
+        keys = rng.random((m, 52))
+        keys[(used[:, None] & deck_bits) != 0] = 2.0
+        runout = np.argpartition(keys, to_come, axis=1)[:, :to_come] if to_come else np.empty((m, 0), dtype=np.int64)
+        full_board = np.concatenate([np.broadcast_to(board_idx, (m, len(board))), runout], axis=1)
+
+        hero_scores = evaluate7(np.concatenate([np.broadcast_to(hero, (m, 2)), full_board], axis=1))
+        opp_scores = np.array([evaluate7(np.concatenate([COMBOS[picks[i]], full_board], axis=1))
+                               for i in range(len(opp_ranges))])
+        best = opp_scores.max(axis=0)
+        ties = (opp_scores == best).sum(axis=0)
+        share = np.where(hero_scores > best, 1.0, np.where(hero_scores == best, 1.0 / (1 + ties), 0.0))
+
+        total += share.sum(); total_sq += (share * share).sum(); n += m
+        mean = total / n
+        if np.sqrt(max(total_sq / n - mean * mean, 0.0) / n) <= target_se:
+            break
+
+    if n == 0:
+        raise ValueError("Opponent ranges never fit together without sharing cards.")
+    return total / n
+
+def bot_best_move(hero_hand, board, pot, to_call, stack, num_opponents=1, opp_ranges=None, rng=None):
+    if opp_ranges is not None:
+        equity = range_equity(hero_hand, board, opp_ranges, rng=rng)
+    else:
+        equity = estimate_equity(hero_hand, board, num_opponents)
     # Pot odds: to_call / (pot + to_call)
     call_ev = equity * (pot + to_call) - to_call
     if call_ev > 0:
@@ -36,3 +246,18 @@ def bot_best_move(hero_hand, board, pot, to_call, stack, num_opponents=1):
     else:
         return f"fold (EV={call_ev:.2f}, eq={equity:.2%})"
 
+def check_evaluate7(pairs=100_000, seed=0):
+    """Counts random pairs of 7-card hands that evaluate7 orders differently from eval7."""
+    rng = np.random.default_rng(seed)
+    hands = np.argsort(rng.random((2 * pairs, 52)), axis=1)[:, :7]
+    scores = evaluate7(hands)
+    ref = np.array([eval7.evaluate([eval7.Card(CARD_STRS[c]) for c in h]) for h in hands])
+    return int((np.sign(scores[::2] - scores[1::2]) != np.sign(ref[::2] - ref[1::2])).sum())
+
+if __name__ == "__main__":
+    # Usage: python eval_hand.py [pairs]  -> checks evaluate7 against eval7's hand ordering
+    import sys
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    mismatches = check_evaluate7(pairs)
+    print(f"evaluate7 vs eval7: {mismatches:,} mismatches in {pairs:,} pairs")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,225 @@
+# history_trie.py
+
+from __future__ import annotations
+import sys
+from array import array
+from functools import lru_cache
+
+# ---------- ACTION-HISTORY TRIE ---------------------------------------------
+# Every per-street betting sequence gets a small integer id. Advancing by one
+# action is a single list lookup, and an infoset key is one packed int instead of
+# a (street, bucket, sorted-history, facing) tuple. Unlike the sorted tuple,
+# different orderings of the same actions stay distinct lines.
+#
+# The common lines are precomputed in a fixed order, so their ids are the same in
+# every run. Deeper lines are interned on first visit during training. The trie is
+# saved in the strategy snapshot, so lookup always uses the trainer's ids. Only
+# lines a 3-handed betting round can reach are precomputed.
+HISTORY_ACTIONS = ['fold', 'call', 'check', 'small', 'medium', 'large', 'all_in']
+ACTION_INDEX    = {a: i for i, a in enumerate(HISTORY_ACTIONS)}
+AGGRESSIVE      = frozenset(('small', 'medium', 'large', 'all_in'))
+ROOT            = 0
+NOT_FOUND       = -1
+
+PRECOMPUTE_DEPTH  = 5
+PRECOMPUTE_RAISES = 3
+
+# Key layout: [ history id | bucket: BKT_BITS | street: 2 | facing: 1 ]
+BKT_BITS = 24
+
+def pack_key(street: int, bkt: int, hist: int, facing: bool) -> int:
+    return (((hist << BKT_BITS) | bkt) << 3) | (street << 1) | int(facing)
+
+def unpack_key(key: int) -> tuple[int, int, int, bool]:
+    """Returns (street, bucket, history id, facing)."""
+    facing = bool(key & 1)
+    street = (key >> 1) & 3
+    rest = key >> 3
+    return street, rest & ((1 << BKT_BITS) - 1), rest >> BKT_BITS, facing
+
+# ---------- 3-HANDED BETTING GRAMMAR ----------------------------------------
+# Lines are checked against a 3-handed betting round that ignores chip amounts.
+# A state is (bet level, seat to act or None once the round is over, seats), and
+# each seat is (status, level matched, still to act). A bet or all-in raises the
+# level and re-opens the action for everyone still in.
+IN, OUT, ALL_IN = 0, 1, 2
+
+def _next_to_act(seats: tuple, start: int) -> int | None:
+    if sum(status != OUT for status, _, _ in seats) <= 1:
+        return None
+    for k in range(len(seats)):
+        i = (start + k) % len(seats)
+        if seats[i][0] == IN and seats[i][2]:
+            return i
+    return None
+
+def start_states(street: int) -> list[tuple]:
+    """Round openings on `street`: pre-flop UTG and SB face the big blind; post-flop
+    two or three players are left, possibly one of them all-in."""
+    if street == 0:
+        return [(1, 0, ((IN, 0, True), (IN, 0, True), (IN, 1, True)))]
+    return [(0, 0, tuple((st, 0, st == IN) for st in table))
+            for table in ((IN, IN, IN), (IN, IN), (IN, IN, ALL_IN))]
+
+def legal_actions(state: tuple) -> list[str]:
+    """Actions open to the seat to act; empty once the round is over."""
+    level, turn, seats = state
+    if turn is None: return []
+    facing = seats[turn][1] < level
+    return (['fold', 'call'] if facing else ['check']) + ['small', 'medium', 'large', 'all_in']
+
+def step(state: tuple, action: str) -> tuple:
+    level, turn, seats = state
+    seats = list(seats)
+    if action == 'fold':
+        seats[turn] = (OUT, seats[turn][1], False)
+    elif action in ('call', 'check'):
+        seats[turn] = (IN, level, False)
+    else:
+        level += 1
+        seats = [(st, m, st == IN) for st, m, _ in seats]
+        seats[turn] = (ALL_IN if action == 'all_in' else IN, level, False)
+    seats = tuple(seats)
+    return level, _next_to_act(seats, turn + 1), seats
+
+def advance(states: list[tuple], action: str) -> list[tuple]:
+    """Steps every state where `action` is legal; an empty result means the line is unreachable."""
+    return [step(st, action) for st in states if action in legal_actions(st)]
+
+class HistoryTrie:
+    def __init__(self, legacy: bool = False):
+        # A migrated trie holds one canonical line per legacy sorted history;
+        # lookups must canonicalize with canonical_line() first.
+        self.legacy = legacy
+        self.children: list[list[int]] = [[NOT_FOUND] * len(HISTORY_ACTIONS)]
+        self.parent = array('i', [NOT_FOUND])
+        self.action = array('b', [NOT_FOUND])
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def child(self, node: int, action: str) -> int:
+        """Advances by one action, interning the new line if it hasn't been seen."""
+        a = ACTION_INDEX[action]
+        nxt = self.children[node][a]
+        if nxt == NOT_FOUND:
+            nxt = len(self.parent)
+            self.children[node][a] = nxt
+            self.children.append([NOT_FOUND] * len(HISTORY_ACTIONS))
+            self.parent.append(node)
+            self.action.append(a)
+        return nxt
+
+    def find(self, node: int, action: str) -> int:
+        """Advances by one action without interning; NOT_FOUND if the line is unknown."""
+        if node == NOT_FOUND: return NOT_FOUND
+        return self.children[node][ACTION_INDEX[action]]
+
+    def lookup(self, seq) -> int:
+        node = ROOT
+        for action in seq:
+            node = self.find(node, action)
+        return node
+
+    def insert(self, seq) -> int:
+        node = ROOT
+        for action in seq:
+            node = self.child(node, action)
+        return node
+
+    def sequence(self, node: int) -> tuple[str, ...]:
+        seq = []
+        while node != ROOT:
+            seq.append(HISTORY_ACTIONS[self.action[node]])
+            node = self.parent[node]
+        return tuple(reversed(seq))
+
+    def precompute(self, depth: int = PRECOMPUTE_DEPTH, max_raises: int = PRECOMPUTE_RAISES):
+        """Interns every reachable line up to `depth` actions breadth-first, so ids are stable across runs."""
+        frontier = [((), start_states(0) + start_states(1))]
+        for _ in range(depth):
+            nxt = []
+            for seq, states in frontier:
+                raises = sum(a in AGGRESSIVE for a in seq)
+                for action in HISTORY_ACTIONS:
+                    if action in AGGRESSIVE and raises >= max_raises: continue
+                    after = advance(states, action)
+                    if not after: continue
+                    self.insert(seq + (action,))
+                    nxt.append((seq + (action,), after))
+            frontier = nxt
+        return self
+
+    # ---- Persistence: (parent, action) pairs in id order rebuild the same trie ----
+    def to_state(self) -> tuple[bytes, bytes, bool]:
+        return self.parent.tobytes(), self.action.tobytes(), self.legacy
+
+    @classmethod
+    def from_state(cls, state: tuple) -> HistoryTrie:
+        trie = cls(legacy=len(state) > 2 and state[2])
+        parents, actions = array('i'), array('b')
+        parents.frombytes(state[0]); actions.frombytes(state[1])
+        for node in range(1, len(parents)):
+            trie.child(parents[node], HISTORY_ACTIONS[actions[node]])
+        return trie
+
+# ---------- LEGACY MIGRATION ------------------------------------------------
+def _first_ordering(states: list[tuple], counts: dict[str, int], prefix: tuple[str, ...],
+                    facing: bool) -> tuple[str, ...] | None:
+    if not any(counts.values()):
+        # The line has to end at a decision with the same facing flag as the key
+        for level, turn, seats in states:
+            if turn is not None and (seats[turn][1] < level) == facing:
+                return prefix
+        return None
+    for action in HISTORY_ACTIONS:
+        if not counts.get(action): continue
+        after = advance(states, action)
+        if not after: continue
+        counts[action] -= 1
+        found = _first_ordering(after, counts, prefix + (action,), facing)
+        counts[action] += 1
+        if found is not None: return found
+    return None
+
+@lru_cache(maxsize=65_536)
+def canonical_line(street: int, sorted_hist: tuple[str, ...], facing: bool) -> tuple[str, ...]:
+    """
+    The line a legacy sorted history is stored under: the first ordering of its actions,
+    in HISTORY_ACTIONS order, that a 3-handed round can reach (the sorted order if none can).
+    """
+    counts: dict[str, int] = {}
+    for action in sorted_hist: counts[action] = counts.get(action, 0) + 1
+    found = _first_ordering(start_states(min(street, 1)), counts, (), facing)
+    return found if found is not None else tuple(sorted_hist)
+
+def migrate_legacy(strategy: dict, trie: HistoryTrie | None = None) -> tuple[dict, HistoryTrie]:
+    """
+    Converts a strategy keyed by (street, bucket, sorted history, facing) tuples to packed keys,
+    one key per legacy entry. The sorted history can't say which ordering was played, so the
+    entry is stored under its canonical_line(); the returned trie is marked legacy so that
+    lookups canonicalize the live history the same way.
+    """
+    trie = trie or HistoryTrie(legacy=True)
+    trie.legacy = True
+    migrated = {}
+    for (street, bkt, hist, facing), strat in strategy.items():
+        line = canonical_line(street, tuple(sorted(hist)), bool(facing))
+        migrated[pack_key(street, bkt, trie.insert(line), facing)] = strat
+    return migrated, trie
+
+def is_legacy(strategy: dict) -> bool:
+    return any(isinstance(k, tuple) for k in strategy)
+
+if __name__ == "__main__":
+    # Usage: python history_trie.py mccfr_3p_fixed.pkl  -> rewrites it with packed keys
+    from strategy_snapshot import load_snapshot, publish_snapshot
+    path = sys.argv[1] if len(sys.argv) > 1 else "mccfr_3p_fixed.pkl"
+    version, strategy, trie_state = load_snapshot(path)
+    if trie_state is not None or not is_legacy(strategy):
+        print(f"{path} already uses packed keys.")
+    else:
+        migrated, trie = migrate_legacy(strategy)
+        publish_snapshot(migrated, version, path, trie=trie)
+        print(f"Migrated {len(strategy):,} legacy infosets to {len(migrated):,} packed keys "
+              f"({len(trie):,} trie nodes) in {path}.")
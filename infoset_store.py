@@ -0,0 +1,118 @@
+# infoset_store.py
+
+from __future__ import annotations
+import os, pickle, sqlite3
+from collections import OrderedDict
+from typing import Callable, Iterator
+
+# ---------- OUT-OF-CORE INFOSET STORE ---------------------------------------
+# Keeps at most `max_resident` nodes in memory (LRU order) and spills the coldest
+# ones to a SQLite file, faulting them back in on access. Resident and on-disk
+# entries are disjoint: a node is deleted from disk when it is faulted in.
+#
+# Outcome-sampling traversals hold references to the nodes on the current path
+# while recursing. Those nodes are always the most recently touched, so as long
+# as the cap is well above the path length they are never evicted mid-update.
+MIN_RESIDENT = 4096
+EVICT_FRACTION = 0.1 # Spill in batches to amortize the SQLite round trips
+
+class InfosetStore:
+    def __init__(self, path: str, max_resident: int, node_factory: Callable,
+                 to_state: Callable, from_state: Callable):
+        if max_resident < MIN_RESIDENT:
+            raise ValueError(f"max_resident must be at least {MIN_RESIDENT}, got {max_resident}")
+        self.path = path
+        self.max_resident = max_resident
+        self.node_factory = node_factory
+        self.to_state = to_state
+        self.from_state = from_state
+
+        self.resident: OrderedDict = OrderedDict()
+        self.on_disk = 0
+        self.hits = self.misses = self.created = self.evicted = 0
+
+        if os.path.exists(path): os.remove(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=OFF")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.execute("CREATE TABLE nodes (key BLOB PRIMARY KEY, state BLOB)")
+
+    # ---- Mapping interface used by the trainer ----
+    def setdefault(self, key, default=None):
+        node = self.resident.get(key)
+        if node is not None:
+            self.hits += 1
+            self.resident.move_to_end(key)
+            return node
+
+        node = self._fault_in(key)
+        if node is None:
+            self.created += 1
+            node = default if default is not None else self.node_factory()
+        self.resident[key] = node
+        if len(self.resident) > self.max_resident:
+            self._spill()
+        return node
+
+    def get(self, key, default=None):
+        if key in self.resident or self._disk_has(key):
+            return self.setdefault(key)
+        return default
+
+    def __getitem__(self, key):
+        node = self.get(key)
+        if node is None: raise KeyError(key)
+        return node
+
+    def __contains__(self, key) -> bool:
+        return key in self.resident or self._disk_has(key)
+
+    def __len__(self) -> int:
+        return len(self.resident) + self.on_disk
+
+    def items(self) -> Iterator[tuple]:
+        """Yields every node without faulting spilled ones back into memory."""
+        yield from list(self.resident.items())
+        for blob_key, blob_state in self.db.execute("SELECT key, state FROM nodes"):
+            yield pickle.loads(blob_key), self.from_state(pickle.loads(blob_state))
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses + self.created
+        return {"resident": len(self.resident), "on_disk": self.on_disk,
+                "hits": self.hits, "misses": self.misses, "created": self.created,
+                "evicted": self.evicted, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        self.db.close()
+        if os.path.exists(self.path): os.remove(self.path)
+
+    # ---- Spilling ----
+    def _disk_has(self, key) -> bool:
+        if not self.on_disk: return False
+        row = self.db.execute("SELECT 1 FROM nodes WHERE key = ?", (self._pack(key),)).fetchone()
+        return row is not None
+
+    def _fault_in(self, key):
+        if not self.on_disk: return None
+        blob_key = self._pack(key)
+        row = self.db.execute("SELECT state FROM nodes WHERE key = ?", (blob_key,)).fetchone()
+        if row is None: return None
+        self.misses += 1
+        self.db.execute("DELETE FROM nodes WHERE key = ?", (blob_key,))
+        self.on_disk -= 1
+        return self.from_state(pickle.loads(row[0]))
+
+    def _spill(self):
+        n = max(1, int(self.max_resident * EVICT_FRACTION))
+        batch = []
+        for _ in range(n):
+            key, node = self.resident.popitem(last=False)
+            batch.append((self._pack(key), pickle.dumps(self.to_state(node), pickle.HIGHEST_PROTOCOL)))
+        with self.db:
+            self.db.executemany("INSERT INTO nodes (key, state) VALUES (?, ?)", batch)
+        self.on_disk += len(batch)
+        self.evicted += len(batch)
+
+    @staticmethod
+    def _pack(key) -> bytes:
+        return pickle.dumps(key, protocol=4)
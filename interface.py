@@ -1,23 +1,28 @@
 # interface.py
 
-import pickle
 import collections
+import json
+import logging
 from treys import Deck, Evaluator
 from cards import parse_cards
 from poker_state import GameState, Player
+from opponent_model import OpponentModel
+from strategy_snapshot import StrategyWatcher
+from decision_metrics import DecisionProfiler
+from history_trie import pack_key, canonical_line, NOT_FOUND
 
 # =================================================================================
 # == CFR BOT INTEGRATION - CODE ADDED FROM TRAINING SCRIPT
 # =================================================================================
 
 # --- Load the trained CFR strategy ---
-try:
-    with open("mccfr_3p_fixed.pkl", "rb") as f:
-        CFR_STRATEGY = pickle.load(f)
-    print("✅ CFR strategy loaded successfully.")
-except FileNotFoundError:
-    print("❌ ERROR: 'mccfr_3p_fixed.pkl' not found. Please run the training script first.")
-    CFR_STRATEGY = {}
+# The trainer republishes this file periodically; the watcher swaps new snapshots in live.
+STRATEGY_FILE = "mccfr_3p_fixed.pkl"
+CFR_STRATEGY = StrategyWatcher(STRATEGY_FILE)
+if CFR_STRATEGY.version is not None:
+    print(f"✅ CFR strategy v{CFR_STRATEGY.version} loaded successfully.")
+else:
+    print(f"❌ ERROR: '{STRATEGY_FILE}' not found. Please run the training script first.")
 
 # --- CFR constants and helper functions ---
 EVALUATOR = Evaluator()
@@ -25,6 +30,15 @@ STREET_TO_INT = {"preflop": 0, "flop": 1, "turn": 2, "river": 3}
 CFR_BET_BUCKETS = {'small': 0.5, 'medium': 1.0, 'large': 2.0} # Pot-relative sizes
 BUCKET_CACHE = {}
 
+# --- Decision instrumentation: per-stage latency + counters, decisions logged as JSON lines ---
+PROFILER = DecisionProfiler()
+DECISION_LOG = logging.getLogger("pokerbot.decisions")
+
+# --- Opponent tendencies, persisted across hands ---
+OPPONENT_FILE = "opponent_stats.pkl"
+STEAL_MIN_FACED = 30       # post-flop bets an opponent must have faced before we trust fold_to_bet
+STEAL_FOLD_TO_BET = 0.6    # bet instead of checking when every live opponent folds at least this often
+
 def get_board(street: int, full_board: list[int]):
     if street == 0: return []
     if street == 1: return full_board[:3]
@@ -35,6 +49,7 @@ def bucket(hand: list[int], board: list[int], street: int) -> int:
     """Calculates a 0-11 hand strength bucket for the current hand and board."""
     key = (*sorted(hand), *sorted(board), street)
     if key in BUCKET_CACHE: return BUCKET_CACHE[key]
+    PROFILER.incr("bucket_cache_miss")
     
     if not board: # Pre-flop bucketing based on raw card ranks
         r1, r2 = (hand[0] >> 8), (hand[1] >> 8)
@@ -99,32 +114,66 @@ def map_cfr_action_to_interface(cfr_action: str, gs: GameState, player: Player)
             
     return "check"
 
-def recommend_move(gs: GameState, hero_hand: list, street_hist: list[str]) -> str:
+def recommend_move(gs: GameState, hero_hand: list, street_hist: list[str], seat: str | None = None) -> str:
     """
     Constructs the infoset key and queries the CFR tree for the best move.
+    `seat` defaults to the hero; self-play passes the acting seat instead.
     """
-    player = gs.players[gs.hero_seat]
+    t0 = PROFILER.now()
+    player = gs.players[seat or gs.hero_seat]
+    # Take one consistent snapshot for the whole decision, even if a reload lands mid-call
+    version, cfr_strategy, trie = CFR_STRATEGY.current
     
     street_int = STREET_TO_INT[gs.street]
     
     hero_hand_ints = [card.int_val for card in hero_hand]
     board_ints = [card.int_val for card in gs.board]
     hand_bkt = bucket(hero_hand_ints, board_ints, street_int)
+    t1 = PROFILER.now()
     
-    hist_tuple = tuple(sorted(street_hist))
     to_call = gs.current_bet - player.last_bet
+    if trie.legacy:
+        # Migrated legacy strategies store each sorted history under one canonical line
+        hist = trie.lookup(canonical_line(street_int, tuple(sorted(street_hist)), to_call > 0))
+    else:
+        hist = trie.lookup(street_hist)
     
-    infoset_key = (street_int, hand_bkt, hist_tuple, to_call > 0)
+    infoset_key = pack_key(street_int, hand_bkt, hist, to_call > 0) if hist != NOT_FOUND else None
+    t2 = PROFILER.now()
     
-    if infoset_key in CFR_STRATEGY:
-        strategy = CFR_STRATEGY[infoset_key]
+    strategy = cfr_strategy.get(infoset_key)
+    if strategy is not None:
         best_cfr_action = max(strategy, key=strategy.get)
-        print(f"🤖 BotDecides: Key={infoset_key}, Strategy={strategy}, Chose='{best_cfr_action}'")
     else:
-        print(f"⚠️ BotDecides: Key={infoset_key} not found in tree. Defaulting to safe move.")
+        PROFILER.incr("key_not_found")
         best_cfr_action = "check" if to_call == 0 else "fold"
+        if to_call == 0 and street_int > 0 and gs.opponent_model is not None:
+            opp_ids = [gs.player_ids.get(p.seat) for p in gs.players.values()
+                       if p.in_hand and p is not player]
+            opp_stats = [gs.opponent_model.stats(pid) for pid in opp_ids if pid is not None]
+            # Only steal when every live opponent is a tracked player who folds to bets often
+            all_tracked = bool(opp_stats) and len(opp_stats) == len(opp_ids)
+            all_fold = all(st["faced_bet"] >= STEAL_MIN_FACED and st["fold_to_bet"] >= STEAL_FOLD_TO_BET
+                           for st in opp_stats)
+            if all_tracked and all_fold:
+                best_cfr_action = "small"
+    t3 = PROFILER.now()
         
-    return map_cfr_action_to_interface(best_cfr_action, gs, player)
+    move = map_cfr_action_to_interface(best_cfr_action, gs, player)
+    t4 = PROFILER.now()
+
+    PROFILER.incr("decisions")
+    PROFILER.record("bucket", t1 - t0)
+    PROFILER.record("key", t2 - t1)
+    PROFILER.record("lookup", t3 - t2)
+    PROFILER.record("map_action", t4 - t3)
+    PROFILER.record("total", t4 - t0)
+    if DECISION_LOG.isEnabledFor(logging.INFO):
+        DECISION_LOG.info(json.dumps({
+            "version": version, "seat": player.seat, "key": infoset_key, "history": street_hist, "found": strategy is not None,
+            "strategy": strategy, "action": best_cfr_action, "move": move, "latency_us": (t4 - t0) / 1000,
+        }))
+    return move
 
 # =================================================================================
 # == GAME FLOW LOGIC
@@ -178,9 +227,11 @@ def post_blinds(gs):
     gs.last_raise_amount = bb
     print(f"Blinds posted: Pot is {gs.pot}. SB: {gs.players['SB'].stack}, BB: {gs.players['BB'].stack}")
 
-def betting_round(gs, seat_order, hero_seat, hero_hand):
+def betting_round(gs, seat_order, hero_seat, hero_hand, choose_action=None):
     """
     Handles a full betting round for any street using a robust queue-based approach.
+    If `choose_action(seat, gs, valid_moves, street_hist)` is given, it supplies every
+    seat's move instead of prompting (headless self-play).
     """
     if gs.street != "preflop":
         for p in gs.players.values():
@@ -216,7 +267,9 @@ def betting_round(gs, seat_order, hero_seat, hero_hand):
         print(f"Valid moves: {', '.join(valid_moves)}")
         
         action_str = ""
-        if seat == hero_seat:
+        if choose_action is not None:
+            action_str = choose_action(seat, gs, valid_moves, street_hist)
+        elif seat == hero_seat:
             recommended = recommend_move(gs, hero_hand, street_hist)
             user_input = input(f"Enter your move (bot suggests: {recommended}): ").strip().lower()
             action_str = user_input if user_input else recommended
@@ -291,11 +344,21 @@ def handle_showdown(gs: GameState):
 
 def main():
     print("=== Poker Bot CLI Trainer ===")
+    logging.basicConfig(level=logging.INFO, format="%(name)s %(message)s")
+    CFR_STRATEGY.start()
     hero_seat = input("Enter your seat (SB, BB, BTN): ").strip().upper()
     hero_hand_str = input("Enter your hand (e.g., Ah Kd): ")
     hero_hand_parsed = parse_cards(hero_hand_str.split())
     
-    gs = GameState(hero_seat=hero_seat, hero_hand=hero_hand_parsed, blinds=(10, 20))
+    # Stats follow the player, not the seat they sit in; the hero is never tracked
+    player_ids = {}
+    for seat in SEATS:
+        if seat != hero_seat:
+            name = input(f"Player name in {seat} (blank to skip stats): ").strip()
+            if name: player_ids[seat] = name
+    opponent_model = OpponentModel.load(OPPONENT_FILE)
+    gs = GameState(hero_seat=hero_seat, hero_hand=hero_hand_parsed, blinds=(10, 20),
+                   opponent_model=opponent_model, player_ids=player_ids)
     for seat in SEATS:
         if seat != hero_seat:
             gs.players[seat] = Player(seat, stack=2000)
@@ -325,6 +388,7 @@ def main():
     print(f"Final Stacks: ")
     for p in gs.players.values():
         print(f"  {p.seat}: {p.stack:.0f}")
+    opponent_model.save(OPPONENT_FILE)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
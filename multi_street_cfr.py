@@ -1,8 +1,12 @@
 from __future__ import annotations
-import random, pickle, sys
+import random, sys, time
 from collections import defaultdict
 from dataclasses import dataclass, field
+from typing import Iterator
 from treys import Deck, Evaluator
+from strategy_snapshot import publish_snapshot, load_snapshot, snapshot_version
+from infoset_store import InfosetStore
+from history_trie import HistoryTrie, pack_key, ROOT
 
 # ---------- CONSTANTS -------------------------------------------------------
 # Added 'check' to the action set for when no bet is faced.
@@ -19,6 +23,9 @@ BIG_BLIND   = 20
 ITERATIONS  = 50_000_000
 SAVE_FILE   = "mccfr_3p_fixed.pkl"
 DEPTH_CAP   = 120
+SNAPSHOT_EVERY = 100_000 # Publish the average strategy for live bots every N iterations
+MAX_RESIDENT_NODES = None # Cap on in-memory nodes; colder ones spill to SPILL_FILE (None = unbounded)
+SPILL_FILE  = "mccfr_nodes.sqlite"
 
 # ---------- GLOBAL CACHES ---------------------------------------------------
 ev           = Evaluator()
@@ -76,6 +83,14 @@ class Node:
             # Default to uniform random strategy if no regrets are positive
             return {a: 1.0 / len(legal_actions) for a in legal_actions}
 
+def node_state(node: Node) -> tuple[dict[str, float], dict[str, float]]:
+    return dict(node.regret), dict(node.strat_sum)
+
+def node_from_state(state: tuple[dict[str, float], dict[str, float]]) -> Node:
+    node = Node()
+    node.regret.update(state[0]); node.strat_sum.update(state[1])
+    return node
+
 # ---------- UTILITY & ACTION HELPERS ----------------------------------------
 def get_utils(stacks: list[int], pot: int, alive: list[bool], hands: list[list[int]], board: list[int]) -> tuple[float, ...]:
     """Calculates final utilities for all players."""
@@ -134,11 +149,32 @@ def deal():
 
 # ---------- MCCFR TRAVERSAL -------------------------------------------------
 sys.setrecursionlimit(1 << 15)
-nodes: dict[tuple, Node] = {}
+nodes: dict[int, Node] | InfosetStore = {}
+# Per-street betting lines -> small ids; infoset keys are pack_key(street, bucket, line id, facing)
+TRIE = HistoryTrie().precompute()
+
+def use_infoset_store(max_resident: int, path: str = SPILL_FILE):
+    """Swaps the node table for a memory-capped store that spills cold infosets to disk."""
+    global nodes
+    store = InfosetStore(path, max_resident, Node, node_state, node_from_state)
+    for key, node in nodes.items():
+        store.setdefault(key, node)
+    nodes = store
+
+def close_infoset_store():
+    """
+    Closes a spilling store and deletes its file once training has saved the strategy.
+    `nodes` goes back to an empty dict, so a later train(max_resident=...) opens a fresh store.
+    """
+    global nodes
+    if isinstance(nodes, InfosetStore):
+        print("Infoset store:", nodes.stats())
+        nodes.close()
+        nodes = {}
 
 def traverse(p: int, street: int, stacks: list[int], street_contrib: list[int], min_raise: int,
              acted: list[bool], alive: list[bool], full_board: list[list[int]],
-             street_hist: tuple[str, ...], hands: list[list[int]], depth: int) -> tuple[float, ...]:
+             hist: int, hands: list[list[int]], depth: int) -> tuple[float, ...]:
     
     # ---- Terminal Node: Hand ends, return utilities ----
     if sum(alive) <= 1 or street == 4:
@@ -150,25 +186,25 @@ def traverse(p: int, street: int, stacks: list[int], street_contrib: list[int],
         # Move to next street
         pot = sum(street_contrib)
         return traverse(p=(1 % 3), street=street + 1, stacks=stacks, street_contrib=[0, 0, 0], min_raise=BIG_BLIND,
-                        acted=[False, False, False], alive=alive, full_board=full_board, street_hist=(), hands=hands, depth=depth + 1)
+                        acted=[False, False, False], alive=alive, full_board=full_board, hist=ROOT, hands=hands, depth=depth + 1)
     
     # ---- Skip players who are folded or all-in ----
     if not alive[p] or stacks[p] == 0:
         return traverse((p + 1) % 3, street, stacks, street_contrib, min_raise, acted, alive,
-                        full_board, street_hist, hands, depth + 1)
+                        full_board, hist, hands, depth + 1)
 
     # ---- Infoset Creation ----
     board = get_board(street, full_board)
     bkt = bucket(hands[p], board, street)
     to_call = max(street_contrib) - street_contrib[p]
-    key = (street, bkt, tuple(sorted(street_hist)), to_call > 0)
+    key = pack_key(street, bkt, hist, to_call > 0)
     node = nodes.setdefault(key, Node())
     
     # ---- Get Policy and Sample Action ----
     legal_actions = get_legal_actions(p, stacks, to_call, street_contrib, min_raise)
     if not legal_actions: # Player is all-in but not the highest bettor
          return traverse((p + 1) % 3, street, stacks, street_contrib, min_raise, acted, alive,
-                        full_board, street_hist, hands, depth + 1)
+                        full_board, hist, hands, depth + 1)
 
     policy = node.policy(legal_actions)
     act = random.choices(list(policy.keys()), weights=list(policy.values()), k=1)[0]
@@ -208,7 +244,7 @@ def traverse(p: int, street: int, stacks: list[int], street_contrib: list[int],
             if nxt_alive[i] and i != p: nxt_acted[i] = False
             
     utils = traverse((p + 1) % 3, street, nxt_stacks, nxt_street_contrib, nxt_min_raise,
-                     nxt_acted, nxt_alive, full_board, street_hist + (act,), hands, depth + 1)
+                     nxt_acted, nxt_alive, full_board, TRIE.child(hist, act), hands, depth + 1)
     
     # ---- Regret & Strategy Sum Updates (for player p) ----
     u_p = utils[p]
@@ -222,7 +258,26 @@ def traverse(p: int, street: int, stacks: list[int], street_contrib: list[int],
     return utils
 
 # ---------- TRAIN -----------------------------------------------------------
-def train(iters:int=ITERATIONS):
+def average_strategy() -> Iterator[tuple[int, dict[str, float]]]:
+    """
+    Yields (key, average strategy) for every node with strategy mass. Nodes are streamed
+    from `nodes` (spilled ones straight from disk), so publishing never holds more than
+    the resident cap plus one snapshot chunk in memory.
+    """
+    for key, node in nodes.items():
+        total_sum = sum(node.strat_sum.values())
+        if total_sum > 0:
+            yield key, {a: s / total_sum for a, s in node.strat_sum.items()}
+
+def train(iters:int=ITERATIONS, max_resident:int|None=MAX_RESIDENT_NODES, save_file:str=SAVE_FILE,
+          max_seconds:float|None=None):
+    """Runs up to `iters` iterations, stopping early once `max_seconds` of wall-clock time have passed."""
+    if max_resident is not None and not isinstance(nodes, InfosetStore):
+        use_infoset_store(max_resident)
+    # Versions keep counting up across trainer restarts, so logged versions stay unique
+    base_version = snapshot_version(save_file)
+    deadline = time.perf_counter() + max_seconds if max_seconds is not None else None
+
     for t in range(1, iters + 1):
         hands, full_board, deck = deal()
         
@@ -237,27 +292,30 @@ def train(iters:int=ITERATIONS):
         
         # Player 2 (UTG) is first to act pre-flop
         traverse(p=2, street=0, stacks=stacks, street_contrib=street_contrib, min_raise=BIG_BLIND,
-                 acted=acted, alive=alive, full_board=full_board, street_hist=(), hands=hands, depth=0)
+                 acted=acted, alive=alive, full_board=full_board, hist=ROOT, hands=hands, depth=0)
         
-        if t % 10 == 0: print(f"Iteration: {t:,}/{iters:,} | Nodes: {len(nodes):,}")
+        if t % 10 == 0:
+            line = f"Iteration: {t:,}/{iters:,} | Nodes: {len(nodes):,}"
+            if isinstance(nodes, InfosetStore):
+                st = nodes.stats()
+                line += f" | Resident: {st['resident']:,} | Hit rate: {st['hit_rate']:.1%} | Faults: {st['misses']:,}"
+            print(line)
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if t % SNAPSHOT_EVERY == 0 and t < iters:
+            publish_snapshot(average_strategy(), base_version + t, save_file, trie=TRIE)
+            print(f"Published snapshot v{base_version + t} to: {save_file}")
 
     # Save the average strategy
-    avg_strategy = {}
-    for key, node in nodes.items():
-        total_sum = sum(node.strat_sum.values())
-        if total_sum > 0:
-            avg_strategy[key] = {a: s / total_sum for a, s in node.strat_sum.items()}
-
-    with open(SAVE_FILE, 'wb') as f:
-        pickle.dump(avg_strategy, f)
-    print("Saved average strategy to:", SAVE_FILE)
+    publish_snapshot(average_strategy(), base_version + t, save_file, trie=TRIE)
+    print("Saved average strategy to:", save_file)
+    close_infoset_store()
 
 if __name__ == "__main__":
     try:
-        with open(SAVE_FILE, 'rb') as f:
-            nodes_data = pickle.load(f)
-            # This is a simplified loading; a full implementation would restore node objects.
-            print(f"Loaded {len(nodes_data)} nodes from {SAVE_FILE}. Resuming training...")
+        version, nodes_data, _ = load_snapshot(SAVE_FILE)
+        # This is a simplified loading; a full implementation would restore node objects.
+        print(f"Loaded {len(nodes_data)} nodes from {SAVE_FILE} (v{version}). Resuming training...")
     except FileNotFoundError:
         print("No saved file found. Starting new training.")
         
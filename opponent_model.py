@@ -0,0 +1,88 @@
+# opponent_model.py
+
+import pickle
+
+class PlayerStats:
+    """Running counters for one player. Every update is O(1); ratios are derived on read."""
+    __slots__ = ("hands", "vpip", "pfr", "bets", "calls", "faced_bet", "folded_to_bet",
+                 "last_hand", "vpip_hand", "pfr_hand")
+
+    COUNTERS = ("hands", "vpip", "pfr", "bets", "calls", "faced_bet", "folded_to_bet")
+
+    def __init__(self, counters=(0, 0, 0, 0, 0, 0, 0)):
+        for name, value in zip(self.COUNTERS, counters):
+            setattr(self, name, value)
+        # Hand ids that were last counted, so VPIP/PFR count at most once per hand
+        self.last_hand = self.vpip_hand = self.pfr_hand = -1
+
+    def counters(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.COUNTERS)
+
+class OpponentModel:
+    """
+    Per-player VPIP, PFR, aggression factor and fold-to-bet, updated incrementally from
+    GameState.record_action and kept across hands. Stats are keyed by player id, not
+    seat, since seats rotate between hands. Fold-to-bet only counts post-flop, since
+    pre-flop every player faces the big blind.
+    """
+    def __init__(self):
+        self.players: dict[str, PlayerStats] = {}
+        self.hand_id = 0
+
+    def start_hand(self):
+        self.hand_id += 1
+
+    def observe(self, player_id: str, street: str, verb: str, facing_bet: bool, is_aggressive: bool):
+        st = self.players.get(player_id)
+        if st is None:
+            st = self.players[player_id] = PlayerStats()
+        if st.last_hand != self.hand_id:
+            st.hands += 1
+            st.last_hand = self.hand_id
+
+        if is_aggressive:
+            st.bets += 1
+        elif verb in ("call", "all_in"):
+            st.calls += 1
+
+        if street == "preflop":
+            if verb != "fold" and verb != "check" and st.vpip_hand != self.hand_id:
+                st.vpip += 1
+                st.vpip_hand = self.hand_id
+            if is_aggressive and st.pfr_hand != self.hand_id:
+                st.pfr += 1
+                st.pfr_hand = self.hand_id
+        elif facing_bet:
+            st.faced_bet += 1
+            if verb == "fold":
+                st.folded_to_bet += 1
+
+    def stats(self, player_id: str) -> dict[str, float]:
+        st = self.players.get(player_id)
+        if st is None or st.hands == 0:
+            return {"hands": 0, "vpip": 0.0, "pfr": 0.0, "aggression": 0.0, "fold_to_bet": 0.0, "faced_bet": 0}
+        return {
+            "hands": st.hands,
+            "vpip": st.vpip / st.hands,
+            "pfr": st.pfr / st.hands,
+            # Aggression factor: (bets + raises) / calls
+            "aggression": st.bets / st.calls if st.calls else float(st.bets),
+            "fold_to_bet": st.folded_to_bet / st.faced_bet if st.faced_bet else 0.0,
+            "faced_bet": st.faced_bet,
+        }
+
+    # ---- Persistence: only the raw counters are stored ----
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump({pid: st.counters() for pid, st in self.players.items()}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "OpponentModel":
+        model = cls()
+        try:
+            with open(path, "rb") as f:
+                for pid, counters in pickle.load(f).items():
+                    model.players[pid] = PlayerStats(counters)
+        except FileNotFoundError:
+            pass
+        return model
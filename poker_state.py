@@ -12,7 +12,7 @@ class Player:
         self.last_bet = 0
 
 class GameState:
-    def __init__(self, hero_seat, hero_hand, blinds=(10, 20)):
+    def __init__(self, hero_seat, hero_hand, blinds=(10, 20), opponent_model=None, player_ids=None):
         self.players = {hero_seat: Player(hero_seat, hero_hand, 2000)}
         self.hero_seat = hero_seat
         self.blinds = blinds
@@ -24,6 +24,12 @@ class GameState:
         self.last_raise_amount = blinds[1]
         self.bet_history = []
         self.street = "preflop"
+        # Optional OpponentModel that outlives this hand; fed from record_action.
+        # It only tracks seats that have a player id here (seat -> id), never the hero's.
+        self.opponent_model = opponent_model
+        self.player_ids = player_ids or {}
+        if opponent_model is not None:
+            opponent_model.start_hand()
 
     def set_board(self, board_cards):
         self.board = board_cards
@@ -41,6 +47,13 @@ class GameState:
         tokens = action.lower().split()
         verb = tokens[0]
 
+        player_id = self.player_ids.get(actor)
+        if self.opponent_model is not None and player_id is not None:
+            facing_bet = self.current_bet > player.last_bet
+            is_aggressive = verb in ('bet', 'raise') or (
+                verb == 'all_in' and player.last_bet + player.stack > self.current_bet)
+            self.opponent_model.observe(player_id, self.street, verb, facing_bet, is_aggressive)
+
         if verb == 'fold':
             player.in_hand = False
         
@@ -0,0 +1,182 @@
+# selfplay.py
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import bot
+import eval_hand
+import interface
+from cards import Card, RANKS, SUITS
+from decision_metrics import DecisionProfiler
+from opponent_model import OpponentModel
+from poker_state import GameState, Player
+
+# =================================================================================
+# == HEADLESS SELF-PLAY: runs 3-handed hands with bots in every seat
+# =================================================================================
+
+STACK = 2000
+BLINDS = (10, 20)
+DECK = [r + s for r in RANKS for s in SUITS]
+UNIFORM_RANGE = np.ones(len(eval_hand.COMBOS))
+# Each worker keeps its own opponent stats across the hands it plays
+OPPONENT_MODEL = OpponentModel()
+# Reseeded per chunk so --seed also fixes the equity agent's sampling
+RNG = np.random.default_rng()
+
+# --- Agents: (gs, seat, valid_moves, street_hist) -> action string ---
+def cfr_agent(gs, seat, valid_moves, street_hist):
+    return interface.recommend_move(gs, gs.players[seat].hand, street_hist, seat=seat)
+
+def random_agent(gs, seat, valid_moves, street_hist):
+    return bot.recommend_move(gs, gs.players[seat].hand, seat, street_hist)
+
+def equity_agent(gs, seat, valid_moves, street_hist):
+    player = gs.players[seat]
+    num_opponents = sum(p.in_hand for p in gs.players.values()) - 1
+    to_call = gs.current_bet - player.last_bet
+    move = eval_hand.bot_best_move([str(c) for c in player.hand], [str(c) for c in gs.board],
+                                   gs.pot, to_call, player.stack,
+                                   opp_ranges=[UNIFORM_RANGE] * num_opponents, rng=RNG)
+    return move.split(" ")[0]
+
+AGENTS = {"cfr": cfr_agent, "random": random_agent, "equity": equity_agent}
+
+def legalize(action_str: str, valid_moves: list[str]) -> str:
+    """Maps an agent's suggestion onto the closest valid move (agents don't all share a format)."""
+    if action_str in valid_moves:
+        return action_str
+    verb = action_str.split(" ")[0] if action_str else ""
+    if verb == "all":  # bot.py says 'all in'
+        verb = "all_in"
+    if verb in ("bet", "raise"):
+        wanted = ("bet", "raise")
+    elif verb == "call":
+        if "check" in valid_moves:
+            return "check"  # nothing to call
+        wanted = ("all_in",)  # facing a bet bigger than the stack: calling it off is the all-in
+    else:
+        wanted = (verb,)
+    for move in valid_moves:
+        if move.split(" ")[0] in wanted:
+            return move
+    return "check" if "check" in valid_moves else "fold"
+
+# --- Hand loop ---
+def play_hand(agent_names: list[str], button: int) -> list[float]:
+    """Plays one hand and returns each agent's result in big blinds."""
+    # Rotate seats so every agent plays every position
+    seat_of = {i: interface.SEATS[(i + button) % 3] for i in range(3)}
+    agent_at = {seat: AGENTS[agent_names[i]] for i, seat in seat_of.items()}
+
+    cards = [Card(c) for c in random.sample(DECK, 11)]
+    hands = {seat: cards[2 * k: 2 * k + 2] for k, seat in enumerate(interface.SEATS)}
+    board = cards[6:]
+
+    # Opponent stats are keyed by agent, so they follow each agent around the table
+    gs = GameState(hero_seat=interface.SEATS[0], hero_hand=hands[interface.SEATS[0]], blinds=BLINDS,
+                   opponent_model=OPPONENT_MODEL,
+                   player_ids={seat: f"{agent_names[i]}#{i}" for i, seat in seat_of.items()})
+    for seat in interface.SEATS[1:]:
+        gs.players[seat] = Player(seat, hands[seat], stack=STACK)
+
+    def choose_action(seat, gs, valid_moves, street_hist):
+        return legalize(agent_at[seat](gs, seat, valid_moves, street_hist), valid_moves)
+
+    interface.post_blinds(gs)
+    interface.betting_round(gs, interface.get_seat_order_preflop(), None, None, choose_action)
+    for street, n_board in (("flop", 3), ("turn", 4), ("river", 5)):
+        if sum(p.in_hand for p in gs.players.values()) <= 1: break
+        gs.set_street(street)
+        gs.set_board(board[:n_board])
+        interface.betting_round(gs, interface.get_seat_order_postflop(), None, None, choose_action)
+    interface.handle_showdown(gs)
+
+    return [(gs.players[seat_of[i]].stack - STACK) / BLINDS[1] for i in range(3)]
+
+# --- Process pool ---
+def _init_worker():
+    # The game loop narrates every action; workers are headless
+    sys.stdout = open(os.devnull, "w")
+
+def run_chunk(args) -> tuple[list[list[float]], DecisionProfiler]:
+    """Plays `n_hands` and returns per-agent [n, sum, sum_sq] of bb won plus the CFR decision profile."""
+    global RNG
+    agent_names, n_hands, seed, first_hand, version = args
+    # Workers never re-poll: every hand of a run is played against the same snapshot
+    if interface.CFR_STRATEGY.version != version:
+        raise RuntimeError(f"Worker has strategy v{interface.CFR_STRATEGY.version}, run is pinned to v{version}")
+    random.seed(seed)
+    RNG = np.random.default_rng(seed)
+    interface.PROFILER.reset()
+    stats = [[0, 0.0, 0.0] for _ in agent_names]
+    for h in range(first_hand, first_hand + n_hands):
+        for i, bb in enumerate(play_hand(agent_names, h % 3)):
+            stats[i][0] += 1
+            stats[i][1] += bb
+            stats[i][2] += bb * bb
+    return stats, interface.PROFILER
+
+def simulate(agent_names: list[str], hands: int, workers: int, chunk: int = 1000, seed: int = 0) -> dict:
+    # Fix the strategy version once; forked workers inherit this loaded snapshot
+    interface.CFR_STRATEGY.poll()
+    version = interface.CFR_STRATEGY.version
+    chunks = []
+    for start in range(0, hands, chunk):
+        chunks.append((agent_names, min(chunk, hands - start), seed + start, start, version))
+
+    totals = [[0, 0.0, 0.0] for _ in agent_names]
+    profile = DecisionProfiler()
+    t0 = time.perf_counter()
+    with Pool(workers, initializer=_init_worker) as pool:
+        for stats, chunk_profile in pool.imap_unordered(run_chunk, chunks):
+            profile.merge(chunk_profile)
+            for total, s in zip(totals, stats):
+                for k in range(3):
+                    total[k] += s[k]
+    elapsed = time.perf_counter() - t0
+
+    results = {}
+    for i, (n, s, sq) in enumerate(totals):
+        mean = s / n
+        var = max(sq / n - mean * mean, 0.0) * n / max(n - 1, 1)
+        ci95 = 1.96 * math.sqrt(var / n)
+        results[f"{agent_names[i]}#{i}"] = {"hands": n, "bb_per_100": mean * 100, "ci95": ci95 * 100}
+    return {"agents": results, "hands": hands, "seconds": elapsed, "hands_per_sec": hands / elapsed,
+            "strategy_version": version, "decisions": profile.snapshot()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless 3-handed self-play.")
+    parser.add_argument("--agents", nargs=3, default=["cfr", "cfr", "random"], choices=sorted(AGENTS))
+    parser.add_argument("--hands", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile-out", help="write the CFR decision latency profile to this JSON file")
+    args = parser.parse_args()
+
+    report = simulate(args.agents, args.hands, args.workers, args.chunk, args.seed)
+    print(f"=== Self-play: {report['hands']:,} hands in {report['seconds']:.1f}s "
+          f"({report['hands_per_sec']:,.0f} hands/sec, strategy v{report['strategy_version']}) ===")
+    for name, r in report["agents"].items():
+        print(f"  {name:10s} {r['bb_per_100']:+9.2f} bb/100  ± {r['ci95']:.2f} (95% CI)")
+
+    decisions = report["decisions"]
+    if decisions["stages"]:
+        print(f"=== CFR decision latency (us) | counters: {decisions['counters']} ===")
+        for stage, h in decisions["stages"].items():
+            print(f"  {stage:10s} p50 {h['p50_us']:9.1f}  p95 {h['p95_us']:9.1f}  p99 {h['p99_us']:9.1f}  max {h['max_us']:9.1f}")
+    if args.profile_out:
+        with open(args.profile_out, "w") as f:
+            json.dump(decisions, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Vector-form public chance sampling MCCFR, an alternative to multi_street_cfr.train().
+
+It does not train the same game as traverse(). traverse() drops chips from earlier
+streets out of the pot, while walk() keeps them, so the same infoset keys get trained
+towards different payoffs. Both engines write SAVE_FILE by default. Don't resume one
+engine's run with the other, or mix their snapshots.
+
+Measured with `python vector_cfr.py --compare 120 --hands 50000 --workers 1` (1 CPU):
+
+    traverse  676,222 iters  167,761 infosets  -48.5 bb/100 +- 42.0  key not found 21%
+    vector      1,413 iters    2,574 infosets  -41.5 bb/100 +- 35.1  key not found 70%
+
+Each walk is about 85 ms, most of it in sample_public() scoring every live combo on
+three streets. At equal wall-clock time the two bots are within each other's 95% CI
+against two random bots, so the hoped-for gain in convergence per second is not shown.
+"""
+from __future__ import annotations
+import argparse, contextlib, io, os, random, time
+from dataclasses import dataclass
+import numpy as np
+from treys import Deck
+
+import multi_street_cfr as msc
+from multi_street_cfr import (Node, get_legal_actions, average_strategy, publish_snapshot, use_infoset_store,
+                              BUCKET_PERC, STACK_START, SMALL_BLIND, BIG_BLIND, SAVE_FILE, MAX_RESIDENT_NODES)
+from infoset_store import InfosetStore
+from strategy_snapshot import snapshot_version
+from history_trie import pack_key, ROOT
+
+# ---------- VECTOR-FORM PUBLIC CHANCE SAMPLING --------------------------------
+# Each iteration samples only the public board. Private hands are carried as
+# vectors over every combo that doesn't collide with that board, and each
+# decision node updates the regrets of every bucket at once. Actions are sampled
+# from the reach-weighted mix of all hands' policies (outcome sampling on the
+# public tree) with importance weights folded into the reach vectors, and
+# showdowns use a bucket-vs-bucket equity matrix built for the sampled board.
+#
+# Approximations: the opponents' hands are treated as independent of each other
+# (no card removal between players), and multiway showdown shares multiply the
+# pairwise equities. Unlike traverse(), chips from earlier streets stay in the
+# pot. Node keys, Node objects and the saved strategy match train().
+ITERATIONS     = 1_000_000
+SNAPSHOT_EVERY = 2_000 # Walks are far heavier than traverse(), so snapshot sooner
+
+FULL_DECK    = Deck.GetFullDeck()
+COMBOS       = np.array([(i, j) for i in range(52) for j in range(i + 1, 52)])  # (1326, 2) deck indices
+COMBO_CARDS  = np.zeros((len(COMBOS), 52), dtype=np.float32)
+COMBO_CARDS[np.arange(len(COMBOS)), COMBOS[:, 0]] = 1
+COMBO_CARDS[np.arange(len(COMBOS)), COMBOS[:, 1]] = 1
+COMBO_HANDS  = [[FULL_DECK[i], FULL_DECK[j]] for i, j in COMBOS]
+# Pre-flop buckets don't depend on the board, so they are computed once
+PREFLOP_BKT  = np.array([msc.bucket(h, [], 0) for h in COMBO_HANDS])
+
+@dataclass(slots=True)
+class PublicDeal:
+    board      : list[list[int]]   # [flop, turn, river] like deal()
+    n_combos   : int
+    labels     : list[np.ndarray]  # per street: bucket value of each dense bucket index
+    inv        : list[np.ndarray]  # per street: dense bucket index of each live combo
+    river_eq   : np.ndarray        # (n_combos, n_river_buckets): equity of the combo's river bucket vs each bucket
+
+def _street_scores(hands: list[list[int]], board: list[int]) -> np.ndarray:
+    return np.array([msc.ev.evaluate(board, h) for h in hands])
+
+def sample_public() -> PublicDeal:
+    """Samples a board and precomputes every live combo's buckets and the river equity matrix."""
+    cards = random.sample(range(52), 5)
+    live = COMBO_CARDS[:, cards].sum(axis=1) == 0
+    hands = [h for h, ok in zip(COMBO_HANDS, live) if ok]
+    onehot = COMBO_CARDS[live]
+    compat = (onehot @ onehot.T) == 0  # pairs of combos that can coexist
+    n_pairs = compat.sum(axis=1)
+
+    ints = [FULL_DECK[c] for c in cards]
+    board = [ints[:3], [ints[3]], [ints[4]]]
+    labels, inv = [], []
+    for street in range(4):
+        if street == 0:
+            bkts = PREFLOP_BKT[live]
+        else:
+            scores = _street_scores(hands, msc.get_board(street, board))
+            # Exact HS percentile over compatible opponent combos (bucket() samples 25 of them)
+            pct = (compat & (scores[None, :] > scores[:, None])).sum(axis=1) / n_pairs
+            bkts = (pct * 12).astype(int)
+            if street == 3: river_scores = scores
+        lab, idx = np.unique(bkts, return_inverse=True)
+        labels.append(lab); inv.append(idx)
+
+    # Bucket-vs-bucket river equity (win + half tie) over compatible combo pairs
+    pair_eq = (river_scores[:, None] < river_scores[None, :]) + 0.5 * (river_scores[:, None] == river_scores[None, :])
+    onehot_b = np.eye(len(labels[3]))[inv[3]]
+    num = onehot_b.T @ (pair_eq * compat) @ onehot_b
+    den = onehot_b.T @ compat.astype(float) @ onehot_b
+    eq = np.where(den > 0, num / np.maximum(den, 1), 0.5)
+    return PublicDeal(board, len(hands), labels, inv, eq[inv[3]])
+
+# ---------- TERMINAL UTILITIES ----------------------------------------------
+def terminal_utils(deal: PublicDeal, stacks: list[float], pot: float, alive: list[bool],
+                   reach: np.ndarray) -> np.ndarray:
+    """Counterfactual utility of every combo for every player, weighted by the opponents' reach."""
+    mass = reach.mean(axis=1)
+    n_river = deal.river_eq.shape[1]
+    river_mass = [np.bincount(deal.inv[3], weights=reach[j], minlength=n_river) / deal.n_combos for j in range(3)]
+    utils = np.empty((3, deal.n_combos))
+    for i in range(3):
+        others = [j for j in range(3) if j != i]
+        utils[i] = (stacks[i] - STACK_START) * np.prod(mass[others])
+        if alive[i]:
+            share = np.ones(deal.n_combos)
+            for j in others:
+                share *= deal.river_eq @ river_mass[j] if alive[j] else mass[j]
+            utils[i] += pot * share
+    return utils
+
+# ---------- VECTOR WALK -----------------------------------------------------
+def walk(p: int, street: int, stacks: list[float], street_contrib: list[float], pot: float, min_raise: int,
+         acted: list[bool], alive: list[bool], hist: int, reach: np.ndarray,
+         deal: PublicDeal) -> np.ndarray:
+
+    # ---- Terminal Node ----
+    if sum(alive) <= 1 or street == 4:
+        return terminal_utils(deal, stacks, pot + sum(street_contrib), alive, reach)
+
+    # ---- Betting round over: move to next street, chips stay in the pot ----
+    if all(acted) and len(set(c for i, c in enumerate(street_contrib) if alive[i])) <= 1:
+        return walk(1 % 3, street + 1, stacks, [0, 0, 0], pot + sum(street_contrib), BIG_BLIND,
+                    [False, False, False], alive, ROOT, reach, deal)
+
+    # ---- Skip players who are folded or all-in ----
+    if not alive[p] or stacks[p] == 0:
+        return walk((p + 1) % 3, street, stacks, street_contrib, pot, min_raise, acted, alive,
+                    hist, reach, deal)
+
+    to_call = max(street_contrib) - street_contrib[p]
+    legal_actions = get_legal_actions(p, stacks, to_call, street_contrib, min_raise)
+    if not legal_actions:
+        return walk((p + 1) % 3, street, stacks, street_contrib, pot, min_raise, acted, alive,
+                    hist, reach, deal)
+
+    # ---- One node per bucket, policies gathered into a (buckets, actions) matrix ----
+    labels, inv = deal.labels[street], deal.inv[street]
+    keys = [pack_key(street, int(b), hist, to_call > 0) for b in labels]
+    policies = np.array([[pol[a] for a in legal_actions]
+                         for pol in (msc.nodes.setdefault(key, Node()).policy(legal_actions) for key in keys)])
+    sigma = policies[inv]  # (combos, actions)
+
+    # ---- Sample the public action from the reach-weighted mix of p's hands ----
+    q = reach[p] @ sigma
+    q = q / q.sum() if q.sum() > 0 else np.full(len(legal_actions), 1.0 / len(legal_actions))
+    k = random.choices(range(len(legal_actions)), weights=q, k=1)[0]
+    act = legal_actions[k]
+    ratio = sigma[:, k] / q[k]
+    nxt_reach = reach.copy()
+    nxt_reach[p] *= ratio
+
+    # ---- Apply Action (same rules as traverse) ----
+    nxt_stacks = list(stacks); nxt_street_contrib = list(street_contrib)
+    nxt_min_raise = min_raise; nxt_acted = list(acted); nxt_alive = list(alive)
+    nxt_acted[p] = True
+
+    if act == 'fold':
+        nxt_alive[p] = False
+    elif act == 'call':
+        payment = min(to_call, nxt_stacks[p])
+        nxt_stacks[p] -= payment
+        nxt_street_contrib[p] += payment
+    elif act != 'check':
+        if act == 'all_in':
+            bet_amount = nxt_stacks[p]
+        else:
+            bet_amount = to_call + int(BUCKET_PERC[act] * sum(nxt_street_contrib))
+            bet_amount = max(to_call + nxt_min_raise, bet_amount)
+        bet_amount = min(bet_amount, nxt_stacks[p])
+        nxt_min_raise = bet_amount - to_call
+        nxt_stacks[p] -= bet_amount
+        nxt_street_contrib[p] += bet_amount
+        for i in range(3):
+            if nxt_alive[i] and i != p: nxt_acted[i] = False
+
+    utils = walk((p + 1) % 3, street, nxt_stacks, nxt_street_contrib, pot, nxt_min_raise,
+                 nxt_acted, nxt_alive, msc.TRIE.child(hist, act), nxt_reach, deal)
+
+    # ---- Vector regret & strategy updates for every bucket of player p ----
+    u_act = utils[p]
+    value = ratio * u_act  # importance-weighted estimate of the node value per combo
+    regret = -np.repeat(value[:, None], len(legal_actions), axis=1)
+    regret[:, k] += u_act / q[k]
+    weighted_sigma = reach[p][:, None] * sigma
+    n_buckets = len(labels)
+    # A walk touches every bucket's node, which can exceed an InfosetStore's cap,
+    # so nodes are fetched again after the recursion instead of held across it.
+    bucket_nodes = [msc.nodes.setdefault(key, Node()) for key in keys]
+    # Each combo has chance probability 1 / n_combos within its bucket's infoset
+    for j, a in enumerate(legal_actions):
+        r_col = (np.bincount(inv, weights=regret[:, j], minlength=n_buckets) / deal.n_combos).tolist()
+        s_col = (np.bincount(inv, weights=weighted_sigma[:, j], minlength=n_buckets) / deal.n_combos).tolist()
+        for node, r, s in zip(bucket_nodes, r_col, s_col):
+            node.regret[a] += r
+            node.strat_sum[a] += s
+
+    utils = utils.copy()
+    utils[p] = value
+    return utils
+
+# ---------- TRAIN -----------------------------------------------------------
+def train_vector(iters: int = ITERATIONS, max_resident: int | None = MAX_RESIDENT_NODES,
+                 save_file: str = SAVE_FILE, max_seconds: float | None = None):
+    """Same outputs as multi_street_cfr.train(): shared `nodes` table and `save_file` snapshots."""
+    if max_resident is not None and not isinstance(msc.nodes, InfosetStore):
+        use_infoset_store(max_resident)
+    base_version = snapshot_version(save_file)
+    deadline = time.perf_counter() + max_seconds if max_seconds is not None else None
+
+    for t in range(1, iters + 1):
+        deal = sample_public()
+        stacks = [float(STACK_START)] * 3
+        stacks[0] -= SMALL_BLIND
+        stacks[1] -= BIG_BLIND
+        reach = np.ones((3, deal.n_combos))
+
+        # Player 2 (UTG) is first to act pre-flop
+        walk(p=2, street=0, stacks=stacks, street_contrib=[SMALL_BLIND, BIG_BLIND, 0.0], pot=0.0,
+             min_raise=BIG_BLIND, acted=[False, False, False], alive=[True, True, True],
+             hist=ROOT, reach=reach, deal=deal)
+
+        if t % 10 == 0: print(f"Iteration: {t:,}/{iters:,} | Nodes: {len(msc.nodes):,}")
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if t % SNAPSHOT_EVERY == 0 and t < iters:
+            publish_snapshot(average_strategy(), base_version + t, save_file, trie=msc.TRIE)
+            print(f"Published snapshot v{base_version + t} to: {save_file}")
+
+    publish_snapshot(average_strategy(), base_version + t, save_file, trie=msc.TRIE)
+    print("Saved average strategy to:", save_file)
+    msc.close_infoset_store()
+
+# ---------- ENGINE COMPARISON -----------------------------------------------
+def compare_engines(seconds: float, hands: int, workers: int, seed: int = 0) -> dict:
+    """
+    Trains train() and train_vector() for the same wall-clock budget into separate files,
+    then measures each strategy's CFR bot against two random bots with selfplay.simulate().
+    """
+    # Imported here: interface loads the live strategy on import, which training doesn't need
+    import interface, selfplay
+    from strategy_snapshot import StrategyWatcher
+
+    results = {}
+    for name, engine in (("traverse", msc.train), ("vector", train_vector)):
+        path = f"compare_{name}.pkl"
+        if os.path.exists(path): os.remove(path)
+        msc.nodes = {}
+        random.seed(seed)
+        engine(save_file=path, max_seconds=seconds)
+        interface.CFR_STRATEGY = StrategyWatcher(path)
+        report = selfplay.simulate(["cfr", "random", "random"], hands, workers, seed=seed)
+        cfr = report["agents"]["cfr#0"]
+        results[name] = {"iterations": report["strategy_version"], "infosets": len(interface.CFR_STRATEGY.strategy),
+                         "bb_per_100": cfr["bb_per_100"], "ci95": cfr["ci95"],
+                         "key_not_found": report["decisions"]["counters"].get("key_not_found", 0),
+                         "decisions": report["decisions"]["counters"].get("decisions", 0)}
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector-form public chance sampling MCCFR.")
+    parser.add_argument("--compare", type=float, metavar="SECONDS",
+                        help="train both engines for SECONDS each and compare them in self-play")
+    parser.add_argument("--hands", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.compare is None:
+        train_vector()
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):  # both trainers narrate every 10 iterations
+            results = compare_engines(args.compare, args.hands, args.workers)
+        print(f"=== {args.compare:.0f}s of training per engine, CFR bot vs 2 random bots, {args.hands:,} hands ===")
+        for name, r in results.items():
+            print(f"  {name:8s} {r['iterations']:>9,} iters  {r['infosets']:>9,} infosets  "
+                  f"{r['bb_per_100']:+9.2f} bb/100 ± {r['ci95']:.2f}  "
+                  f"key not found {r['key_not_found']:,}/{r['decisions']:,}")